@@ -1,5 +1,16 @@
-from datetime import datetime
-from typing import Any
+import math
+import sys
+from array import array
+from collections import defaultdict
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Any, NamedTuple
+
+try:
+    # Optional C-accelerated backend (bit-parallel Levenshtein); pure Python is used when missing
+    from rapidfuzz.distance import Levenshtein as _rf_levenshtein
+except ImportError:
+    _rf_levenshtein = None
 
 Attachment = dict[str, Any]
 Transaction = dict[str, Any]
@@ -11,6 +22,7 @@ FUZZY_MATCH_WORD_LENGTH_CUTOFF = 6  # Words longer than this allow fuzzy matchin
 FUZZY_MATCH_THRESHOLD_LONG = 0.85  # Allow 15% character differences for long words
 FUZZY_MATCH_THRESHOLD_SHORT = 1.0  # Require exact match for short words
 DEFAULT_DATE_TOLERANCE_DAYS = 1  # Banking processing delay tolerance
+MYERS_MAX_PATTERN_LENGTH = 64  # Longest pattern handled by the bit-parallel Levenshtein path
 
 # Points-based scoring system (normalized to 0.0 - 1.0 scale)
 # Award points for each matching criterion, then divide by MAX_POINTS to get confidence percentage
@@ -21,10 +33,12 @@ MAX_POINTS = POINTS_DATE_MATCH + POINTS_NAME_MATCH + POINTS_NULL_CONTACT_BONUS
 MIN_MATCH_CONFIDENCE = 0.4  # Minimum confidence threshold (40%) to accept a match
 
 
+@lru_cache(maxsize=8192)
 def normalize_reference(ref: str | None) -> str | None:
     """Remove whitespace and leading zeros from reference numbers.
 
     Preserves letter prefixes (RF, FI) and only strips zeros from numeric part.
+    Results are cached since the same references are normalized repeatedly.
 
     Examples:
         "12345672" → "12345672"
@@ -89,36 +103,132 @@ def amounts_match(amount1: float, amount2: float) -> bool:
     return abs(abs(amount1) - abs(amount2)) < AMOUNT_TOLERANCE
 
 
-def levenshtein_distance(s1: str, s2: str) -> int:
+def _myers_distance(pattern: str, text: str) -> int:
+    """Calculate the Levenshtein distance using Myers' bit-parallel algorithm.
+
+    Each DP column is encoded as vertical +1/-1 delta bitvectors, so a whole
+    column is updated with a handful of integer operations per text character.
+    Intended for patterns of at most MYERS_MAX_PATTERN_LENGTH characters.
+    """
+    m = len(pattern)
+    if m == 0:
+        return len(text)
+
+    # Bitmask of positions for each character in the pattern
+    peq: dict[str, int] = {}
+    for i, c in enumerate(pattern):
+        peq[c] = peq.get(c, 0) | (1 << i)
+
+    mask = (1 << m) - 1
+    last = 1 << (m - 1)
+    vp = mask
+    vn = 0
+    score = m
+
+    for c in text:
+        x = peq.get(c, 0) | vn
+        d0 = (((x & vp) + vp) ^ vp) | x
+        hp = (vn | ~(d0 | vp)) & mask
+        hn = vp & d0
+
+        if hp & last:
+            score += 1
+        elif hn & last:
+            score -= 1
+
+        x = ((hp << 1) | 1) & mask
+        vn = x & d0
+        vp = ((hn << 1) | ~(x | d0)) & mask
+
+    return score
+
+
+def levenshtein_distance(s1: str, s2: str, max_distance: int | None = None) -> int:
     """Calculate the Levenshtein distance between two strings.
 
     This measures the minimum number of single-character edits (insertions,
     deletions, or substitutions) needed to change one string into the other.
 
+    If max_distance is given, computation stops as soon as the distance is
+    known to exceed it, and max_distance + 1 is returned instead.
+
     Examples:
         levenshtein_distance("kitten", "sitting") → 3
         levenshtein_distance("Meikäläinen", "Meittiläinen") → 2
     """
+    if _rf_levenshtein is not None:
+        return _rf_levenshtein.distance(s1, s2, score_cutoff=max_distance)
+
+    # Make s1 the longer string
     if len(s1) < len(s2):
-        return levenshtein_distance(s2, s1)
+        s1, s2 = s2, s1
+
+    # The length difference is a lower bound on the distance
+    if max_distance is not None and len(s1) - len(s2) > max_distance:
+        return max_distance + 1
 
     if len(s2) == 0:
         return len(s1)
 
-    # Create a distance matrix
-    previous_row = range(len(s2) + 1)
+    # Bit-parallel path for short strings (names are essentially always short)
+    if len(s2) <= MYERS_MAX_PATTERN_LENGTH:
+        distance = _myers_distance(s2, s1)
+        if max_distance is not None and distance > max_distance:
+            return max_distance + 1
+        return distance
+
+    # ASCII strings are compared as bytes, whose items are ints rather than 1-char strings
+    # (not worth the encoding cost on the bit-parallel path above)
+    if s1.isascii() and s2.isascii():
+        s1, s2 = s1.encode("ascii"), s2.encode("ascii")
+
+    # Two preallocated rows of the distance matrix, swapped after each row
+    previous_row = array("i", range(len(s2) + 1))
+    current_row = array("i", previous_row)
 
     for i, c1 in enumerate(s1):
-        current_row = [i + 1]
+        current_row[0] = i + 1
         for j, c2 in enumerate(s2):
             # Cost of insertions, deletions, or substitutions
+            # (plain comparisons instead of min(), which builds a tuple per cell)
             insertions = previous_row[j + 1] + 1
             deletions = current_row[j] + 1
             substitutions = previous_row[j] + (c1 != c2)
-            current_row.append(min(insertions, deletions, substitutions))
-        previous_row = current_row
+            cost = insertions if insertions < deletions else deletions
+            if substitutions < cost:
+                cost = substitutions
+            current_row[j + 1] = cost
+        previous_row, current_row = current_row, previous_row
+
+        # Row minimums never decrease, so once every cell exceeds the cutoff we can stop
+        if max_distance is not None and min(previous_row) > max_distance:
+            return max_distance + 1
 
-    return previous_row[-1]
+    distance = previous_row[-1]
+    if max_distance is not None and distance > max_distance:
+        return max_distance + 1
+    return distance
+
+
+def _word_match_threshold(word: str) -> float:
+    """Minimum similarity a word needs to count as a fuzzy match.
+
+    Allow up to 15% character differences for longer words.
+    Require exact match for shorter words to avoid false positives.
+    """
+    return FUZZY_MATCH_THRESHOLD_LONG if len(word) > FUZZY_MATCH_WORD_LENGTH_CUTOFF else FUZZY_MATCH_THRESHOLD_SHORT
+
+
+@lru_cache(maxsize=4096)
+def _normalize_name(name: str) -> tuple[str, tuple[str, ...]]:
+    """Lowercase and strip a name, and extract its significant words.
+
+    Cached since the same counterparties are compared against many candidates.
+    Short words (company suffixes like "Oy", "AB") are left out of the word list.
+    """
+    normalized = sys.intern(name.lower().strip())
+    significant_words = tuple(w for w in normalized.split() if len(w) > MIN_SIGNIFICANT_WORD_LENGTH)
+    return normalized, significant_words
 
 
 def names_match(name1: str | None, name2: str | None) -> bool:
@@ -126,7 +236,8 @@ def names_match(name1: str | None, name2: str | None) -> bool:
 
     Uses a combination of substring matching and fuzzy string matching:
     1. Exact substring match (handles company suffixes)
-    2. Fuzzy match using Levenshtein distance (handles spelling variations)
+    2. Exact word match, which also rejects names whose short words differ
+    3. Fuzzy match using Levenshtein distance (handles spelling variations)
 
     Examples:
         - "Matti Meikäläinen" matches "Matti Meikäläinen Tmi" ✓ (substring)
@@ -137,53 +248,85 @@ def names_match(name1: str | None, name2: str | None) -> bool:
         return False
 
     # Normalize: lowercase and strip whitespace
-    n1 = name1.lower().strip()
-    n2 = name2.lower().strip()
+    return _normalized_names_match(_normalize_name(name1), _normalize_name(name2))
+
+
+@lru_cache(maxsize=32768)
+def _normalized_names_match(
+    name1: tuple[str, tuple[str, ...]],
+    name2: tuple[str, tuple[str, ...]],
+) -> bool:
+    """names_match() on the output of _normalize_name().
+
+    Cached per ordered pair of normalized names, since the same counterparties
+    recur across many transactions. The pair isn't sorted: with equal word
+    counts the check runs from name1's words, so it isn't symmetric.
+    """
+    n1, significant_words1 = name1
+    n2, significant_words2 = name2
 
     # Strategy 1: Exact substring match (handles company suffixes)
     if n1 in n2 or n2 in n1:
         return True
 
-    # Strategy 2: Fuzzy matching for spelling variations
-    # Split names into words and compare each word pair
-    words1 = n1.split()
-    words2 = n2.split()
-
-    # Filter out company suffixes and very short words
-    significant_words1 = [w for w in words1 if len(w) > MIN_SIGNIFICANT_WORD_LENGTH]
-    significant_words2 = [w for w in words2 if len(w) > MIN_SIGNIFICANT_WORD_LENGTH]
-
     # If either name has no significant words, can't do fuzzy matching
     if not significant_words1 or not significant_words2:
         return False
 
-    # For each word in the shorter name, try to find a fuzzy match in the other
+    # For each word in the shorter name, try to find a match in the other
     shorter_words = significant_words1 if len(significant_words1) <= len(significant_words2) else significant_words2
     longer_words = significant_words2 if len(significant_words1) <= len(significant_words2) else significant_words1
 
-    matched_count = 0
-    total_significant_words = len(shorter_words)
-
+    # Strategy 2: Exact word matches need no edit distance, and words that
+    # require an exact match can't match fuzzily either
+    longer_word_set = set(longer_words)
+    fuzzy_words = []
     for short_word in shorter_words:
+        if short_word in longer_word_set:
+            continue
+        if _word_match_threshold(short_word) >= 1.0:
+            return False
+        fuzzy_words.append(short_word)
+
+    if not fuzzy_words:
+        return True
+
+    # Strategy 3: Fuzzy matching for spelling variations on the remaining words
+    # Require ALL significant words to have fuzzy matches
+    # This prevents "Matti Meikäläinen" from matching "Matti Meittiläinen"
+    # because while "Matti" matches, "Meikäläinen" won't match "Meittiläinen" (75% similar)
+    # levenshtein_distance() uses rapidfuzz when available, so both backends share this threshold rule
+    for short_word in fuzzy_words:
+        threshold = _word_match_threshold(short_word)
+
         best_similarity = 0
         for long_word in longer_words:
-            # Calculate similarity ratio
-            distance = levenshtein_distance(short_word, long_word)
+            # Calculate similarity ratio; pairs that can't reach the threshold
+            # are cut off early (the exact distance doesn't matter for them)
             max_len = max(len(short_word), len(long_word))
+            max_edits = int((1 - threshold) * max_len)
+            distance = levenshtein_distance(short_word, long_word, max_edits)
             similarity = 1 - (distance / max_len)
             best_similarity = max(best_similarity, similarity)
 
-        # Allow up to 15% character differences for longer words
-        # Require exact match for shorter words to avoid false positives
-        threshold = FUZZY_MATCH_THRESHOLD_LONG if len(short_word) > FUZZY_MATCH_WORD_LENGTH_CUTOFF else FUZZY_MATCH_THRESHOLD_SHORT
+        if best_similarity < threshold:
+            return False
 
-        if best_similarity >= threshold:
-            matched_count += 1
+    return True
 
-    # Require ALL significant words to have fuzzy matches
-    # This prevents "Matti Meikäläinen" from matching "Matti Meittiläinen"
-    # because while "Matti" matches, "Meikäläinen" won't match "Meittiläinen" (75% similar)
-    return matched_count == total_significant_words
+
+@lru_cache(maxsize=4096)
+def _parse_date(date_str: str) -> int:
+    """Parse a YYYY-MM-DD date into its proleptic Gregorian ordinal.
+
+    Cached since the same dates are compared against many candidates.
+    Raises ValueError/TypeError for invalid input.
+    """
+    # Zero-padded ISO dates go through the C-implemented fromisoformat; anything
+    # else (e.g. "2024-7-5", which strptime also accepts) uses the format parser
+    if len(date_str) == 10 and date_str[4] == "-" and date_str[7] == "-":
+        return date.fromisoformat(date_str).toordinal()
+    return datetime.strptime(date_str, "%Y-%m-%d").toordinal()
 
 
 def dates_within_range(date1: str, date2: str, days: int = DEFAULT_DATE_TOLERANCE_DAYS) -> bool:
@@ -192,10 +335,7 @@ def dates_within_range(date1: str, date2: str, days: int = DEFAULT_DATE_TOLERANC
     Based on data analysis, successful matches have 0-1 day difference.
     """
     try:
-        d1 = datetime.strptime(date1, "%Y-%m-%d")
-        d2 = datetime.strptime(date2, "%Y-%m-%d")
-        diff = abs((d1 - d2).days)
-        return diff <= days
+        return abs(_parse_date(date1) - _parse_date(date2)) <= days
     except (ValueError, TypeError):
         return False
 
@@ -234,13 +374,100 @@ def is_direction_compatible(tx_amount: float, attachment: Attachment) -> bool:
         return "recipient" in data
 
 
+class PreparedAttachment(NamedTuple):
+    """Attachment fields derived once up front so matching loops don't re-parse them."""
+
+    ref: str | None
+    amount: float
+    dates: list[str]
+    date_ordinals: tuple[int, ...]  # Parsed dates; unparseable ones are left out
+    counterparty: str | None
+    has_supplier: bool
+    has_recipient: bool
+    attachment: Attachment
+
+
+def _date_ordinals(dates: list[str | None]) -> tuple[int, ...]:
+    """Parse dates into day ordinals, skipping values that aren't valid dates.
+
+    Invalid dates never fall within range of anything (see dates_within_range),
+    so dropping them doesn't change any date comparison.
+    """
+    ordinals = []
+    for date_str in dates:
+        try:
+            ordinals.append(_parse_date(date_str))
+        except (ValueError, TypeError):
+            continue
+    return tuple(ordinals)
+
+
+def _prepare_attachment(attachment: Attachment) -> PreparedAttachment:
+    """Extract and normalize all matching-relevant fields of an attachment."""
+    data = attachment.get("data", {})
+    dates = get_attachment_dates(attachment)
+    counterparty = get_counterparty(attachment)
+    return PreparedAttachment(
+        ref=normalize_reference(data.get("reference")),
+        amount=data.get("total_amount", 0),
+        dates=dates,
+        date_ordinals=_date_ordinals(dates),
+        # Interned so repeated counterparties share one string object
+        counterparty=sys.intern(counterparty) if isinstance(counterparty, str) else counterparty,
+        has_supplier="supplier" in data,
+        has_recipient="recipient" in data,
+        attachment=attachment,
+    )
+
+
+def _build_ref_index(prepared: list[PreparedAttachment]) -> dict[str, Attachment]:
+    """Map each normalized attachment reference to its attachment.
+
+    If several attachments share a reference, the first one wins
+    (same as scanning the list in order).
+    """
+    index: dict[str, Attachment] = {}
+    for att in prepared:
+        if att.ref:
+            index.setdefault(att.ref, att.attachment)
+    return index
+
+
+def _is_amount(value: Any) -> bool:
+    """Check that a value is a finite number, i.e. something amounts_match() can match."""
+    return isinstance(value, (int, float)) and math.isfinite(value)
+
+
+def _amount_to_cents(amount: float) -> int:
+    """Truncate an absolute amount to whole cents for bucketing.
+
+    Uses floor rather than round(): round() rounds half to even on the float
+    value, which can put amounts less than a cent apart two buckets apart.
+    """
+    return math.floor(abs(amount) * 100)
+
+
+def _build_amount_index(prepared: list[PreparedAttachment]) -> dict[int, list[PreparedAttachment]]:
+    """Group attachments by their amount in whole cents.
+
+    Since AMOUNT_TOLERANCE is one cent, any amount that can match lies in the
+    bucket of the query amount or in one of its two neighbours. Attachments
+    without a finite numeric amount can never match on amount and are left out.
+    """
+    index: dict[int, list[PreparedAttachment]] = defaultdict(list)
+    for att in prepared:
+        if _is_amount(att.amount):
+            index[_amount_to_cents(att.amount)].append(att)
+    return index
+
+
 def _score_match(
     source_amount: float,
-    source_date: str,
+    source_dates: tuple[int, ...],
     source_contact: str | None,
     source_ref: str | None,
     target_amount: float,
-    target_dates: list[str],
+    target_dates: tuple[int, ...],
     target_counterparty: str | None,
     target_ref: str | None,
     target_item: dict[str, Any],
@@ -249,11 +476,11 @@ def _score_match(
 
     Args:
         source_amount: Source item's transaction amount
-        source_date: Source item's date
+        source_dates: Source item's relevant dates as day ordinals (see _date_ordinals)
         source_contact: Source item's contact name
         source_ref: Source item's reference number
         target_amount: Target item's amount
-        target_dates: List of relevant dates from target item
+        target_dates: Target item's relevant dates as day ordinals
         target_counterparty: Target item's counterparty name
         target_ref: Target item's reference number
         target_item: The actual target dictionary (attachment or transaction)
@@ -268,14 +495,21 @@ def _score_match(
         return (1.0, target_item)
 
     # Amount must match (REQUIRED for multi-signal matching)
-    if not amounts_match(source_amount, target_amount):
+    # Same check as amounts_match(), inlined since it runs for every candidate
+    if abs(abs(source_amount) - abs(target_amount)) >= AMOUNT_TOLERANCE:
         return None
 
-    # Check date compatibility
-    date_matches = any(dates_within_range(source_date, target_date) for target_date in target_dates)
+    # Check date compatibility (cheap, dates are pre-parsed to day ordinals)
+    date_matches = any(
+        abs(source_date - target_date) <= DEFAULT_DATE_TOLERANCE_DAYS
+        for source_date in source_dates
+        for target_date in target_dates
+    )
 
-    # Check name compatibility
-    name_matches = names_match(source_contact, target_counterparty)
+    # Check name compatibility (expensive, so last)
+    # names_match() is always False when a contact is missing, so skip it then
+    has_both_contacts = source_contact is not None and target_counterparty is not None
+    name_matches = has_both_contacts and names_match(source_contact, target_counterparty)
 
     # Points-based scoring (normalized to 0.0-1.0 by dividing by MAX_POINTS):
     # Award points for each matching criterion, then normalize to get confidence percentage
@@ -297,12 +531,12 @@ def _score_match(
         points += POINTS_DATE_MATCH
     if name_matches:
         points += POINTS_NAME_MATCH
-    if (source_contact is None or target_counterparty is None) and date_matches:
+    if not has_both_contacts and date_matches:
         points += POINTS_NULL_CONTACT_BONUS
 
     # Critical: If BOTH have contacts but they don't match, reject this candidate
     # This prevents false matches like 2006 (Matti Meittiläinen) matching 3005 (Matti Meikäläinen Tmi)
-    if source_contact is not None and target_counterparty is not None and not name_matches and date_matches:
+    if has_both_contacts and not name_matches and date_matches:
         return None  # Name mismatch is disqualifying when both sides have names
 
     # Normalize points to 0.0-1.0 confidence scale
@@ -314,6 +548,28 @@ def _score_match(
     return None
 
 
+def _select_best(candidates: list[tuple[float, dict[str, Any]]]) -> dict[str, Any] | None:
+    """Pick the highest scoring candidate item in a single pass.
+
+    Returns None when there are no candidates, or when the top score is
+    shared by several candidates (ambiguous, to avoid false positives).
+    """
+    best_score = second_score = -1.0
+    best_item = None
+
+    for score, item in candidates:
+        if score > best_score:
+            second_score = best_score
+            best_score, best_item = score, item
+        elif score > second_score:
+            second_score = score
+
+    if best_score == second_score:
+        return None
+
+    return best_item
+
+
 def find_attachment(
     transaction: Transaction,
     attachments: list[Attachment],
@@ -323,9 +579,12 @@ def find_attachment(
     Matching strategy:
     1. First try reference number matching (strongest signal) - bypasses all other checks
     2. Then try multi-signal matching (amount + date/name)
+
+    Attachment fields are only extracted for direction-compatible attachments
+    whose amount matches. Use Matcher to match many transactions against the
+    same attachments, so they are prepared and indexed once.
     """
     tx_ref = normalize_reference(transaction.get("reference"))
-    tx_date = transaction.get("date")
     tx_amount = transaction.get("amount")
     tx_contact = transaction.get("contact")
 
@@ -336,31 +595,32 @@ def find_attachment(
             if att_ref and tx_ref == att_ref:
                 return attachment
 
+    if not _is_amount(tx_amount):
+        return None
+
     # SECOND PASS: Multi-signal matching
+    tx_dates = _date_ordinals([transaction.get("date")])
     candidates = []
 
     for attachment in attachments:
-        data = attachment.get("data", {})
-
         # Direction must be compatible for multi-signal matching
         if not is_direction_compatible(tx_amount, attachment):
             continue
 
-        # Extract attachment details
-        att_ref = normalize_reference(data.get("reference"))
-        att_amount = data.get("total_amount", 0)
-        att_dates = get_attachment_dates(attachment)
-        att_counterparty = get_counterparty(attachment)
+        # Amount must match before the remaining fields are worth extracting
+        att_amount = attachment.get("data", {}).get("total_amount", 0)
+        if not _is_amount(att_amount) or not amounts_match(tx_amount, att_amount):
+            continue
 
         # Score this potential match (skip reference since we're past that phase)
         result = _score_match(
             source_amount=tx_amount,
-            source_date=tx_date,
+            source_dates=tx_dates,
             source_contact=tx_contact,
             source_ref=None,  # Don't use ref in this pass
             target_amount=att_amount,
-            target_dates=att_dates,
-            target_counterparty=att_counterparty,
+            target_dates=_date_ordinals(get_attachment_dates(attachment)),
+            target_counterparty=get_counterparty(attachment),
             target_ref=None,  # Don't use ref in this pass
             target_item=attachment,
         )
@@ -368,19 +628,95 @@ def find_attachment(
         if result:
             candidates.append(result)
 
-    # If no candidates, return None
-    if not candidates:
-        return None
+    return _select_best(candidates)
 
-    # Sort by score (descending)
-    candidates.sort(key=lambda x: x[0], reverse=True)
 
-    # If we have multiple candidates with the same top score, it's ambiguous
-    # Return None to avoid false positives
-    if len(candidates) > 1 and candidates[0][0] == candidates[1][0]:
-        return None
+def find_attachments_bulk(
+    transactions: list[Transaction],
+    attachments: list[Attachment],
+) -> list[Attachment | None]:
+    """Find the best matching attachment for each transaction.
+
+    Attachments are prepared once and reused for every transaction.
+    Results are returned in the same order as `transactions`.
+    """
+    matcher = Matcher(attachments)
+    return [matcher.find_attachment(transaction) for transaction in transactions]
+
+
+class Matcher:
+    """Matches many transactions against a fixed set of attachments.
 
-    return candidates[0][1]
+    Attachment preparation, the reference index and the amount buckets are
+    built once in the constructor and shared by every find_attachment() call.
+    """
+
+    def __init__(self, attachments: list[Attachment]):
+        self.attachments = attachments
+        self._prepared = [_prepare_attachment(attachment) for attachment in attachments]
+        self._ref_index = _build_ref_index(self._prepared)
+
+        # Amount buckets split by direction (same rule as is_direction_compatible):
+        # outgoing payments match attachments with a supplier, incoming ones a recipient
+        self._outgoing_by_cent = _build_amount_index([att for att in self._prepared if att.has_supplier])
+        self._incoming_by_cent = _build_amount_index([att for att in self._prepared if att.has_recipient])
+
+    def _amount_candidates(self, tx_amount: float) -> list[PreparedAttachment]:
+        """Direction-compatible attachments whose amount is within a cent of tx_amount."""
+        if not _is_amount(tx_amount):
+            return []
+        by_cent = self._outgoing_by_cent if tx_amount < 0 else self._incoming_by_cent
+        cents = _amount_to_cents(tx_amount)
+        return [
+            *by_cent.get(cents - 1, ()),
+            *by_cent.get(cents, ()),
+            *by_cent.get(cents + 1, ()),
+        ]
+
+    def find_attachment(self, transaction: Transaction) -> Attachment | None:
+        """Find the best matching attachment for a given transaction."""
+        tx_ref = normalize_reference(transaction.get("reference"))
+        tx_dates = _date_ordinals([transaction.get("date")])
+        tx_amount = transaction.get("amount")
+        tx_contact = transaction.get("contact")
+
+        # FIRST PASS: Reference matching (bypasses direction and other checks)
+        if tx_ref:
+            ref_match = self._ref_index.get(tx_ref)
+            if ref_match is not None:
+                return ref_match
+
+        # SECOND PASS: Multi-signal matching, only over direction-compatible
+        # attachments in the neighbouring amount buckets
+        candidates = []
+
+        for att in self._amount_candidates(tx_amount):
+            # Score this potential match (skip reference since we're past that phase)
+            result = _score_match(
+                source_amount=tx_amount,
+                source_dates=tx_dates,
+                source_contact=tx_contact,
+                source_ref=None,  # Don't use ref in this pass
+                target_amount=att.amount,
+                target_dates=att.date_ordinals,
+                target_counterparty=att.counterparty,
+                target_ref=None,  # Don't use ref in this pass
+                target_item=att.attachment,
+            )
+
+            if result:
+                candidates.append(result)
+
+        return _select_best(candidates)
+
+    def find_all(self, transactions: list[Transaction]) -> dict[Any, Attachment | None]:
+        """Find the best matching attachment for each transaction, keyed by transaction id.
+
+        Every transaction must have an "id" (KeyError otherwise), and ids should be
+        unique: a repeated id keeps only the result of its last transaction.
+        Use find_attachments_bulk() for results by position instead.
+        """
+        return {transaction["id"]: self.find_attachment(transaction) for transaction in transactions}
 
 
 def find_transaction(
@@ -391,65 +727,52 @@ def find_transaction(
 
     Mirrors the logic of find_attachment() in reverse direction.
     """
-    data = attachment.get("data", {})
-    att_ref = normalize_reference(data.get("reference"))
-    att_dates = get_attachment_dates(attachment)
-    att_amount = data.get("total_amount", 0)
-    att_counterparty = get_counterparty(attachment)
+    att = _prepare_attachment(attachment)
 
     # FIRST PASS: Reference matching (bypasses direction and other checks)
-    if att_ref:
+    if att.ref:
         for transaction in transactions:
             tx_ref = normalize_reference(transaction.get("reference"))
-            if tx_ref and att_ref == tx_ref:
+            if tx_ref and att.ref == tx_ref:
                 return transaction
 
+    # For find_transaction, we need to check all attachment dates against the single transaction date
+    # If attachment has no dates, no transaction can match on multiple signals
+    if not att.dates:
+        return None
+
+    # Direction must be compatible for multi-signal matching (see is_direction_compatible):
+    # outgoing transactions need a supplier, incoming ones a recipient
+    accepts_outgoing = att.has_supplier
+    accepts_incoming = att.has_recipient
+    if not accepts_outgoing and not accepts_incoming:
+        return None
+
     # SECOND PASS: Multi-signal matching
     candidates = []
 
     for transaction in transactions:
         tx_amount = transaction.get("amount")
         tx_contact = transaction.get("contact")
-        tx_date = transaction.get("date")
-
-        # Direction must be compatible for multi-signal matching
-        if not is_direction_compatible(tx_amount, attachment):
-            continue
 
-        # For find_transaction, we need to check all attachment dates against the single transaction date
-        # If attachment has no dates, skip it
-        if not att_dates:
+        if not (accepts_outgoing if tx_amount < 0 else accepts_incoming):
             continue
 
-        best_result = None
-        for att_date in att_dates:
-            result = _score_match(
-                source_amount=att_amount,
-                source_date=att_date,
-                source_contact=att_counterparty,
-                source_ref=None,  # Don't use ref in this pass
-                target_amount=tx_amount,
-                target_dates=[tx_date],
-                target_counterparty=tx_contact,
-                target_ref=None,  # Don't use ref in this pass
-                target_item=transaction,
-            )
-            if result and (not best_result or result[0] > best_result[0]):
-                best_result = result
-
-        if best_result:
-            candidates.append(best_result)
-
-    # If no candidates, return None
-    if not candidates:
-        return None
-
-    # Sort by score (descending)
-    candidates.sort(key=lambda x: x[0], reverse=True)
+        # Any attachment date within range of the transaction date counts,
+        # which is the best score over the individual attachment dates
+        result = _score_match(
+            source_amount=att.amount,
+            source_dates=att.date_ordinals,
+            source_contact=att.counterparty,
+            source_ref=None,  # Don't use ref in this pass
+            target_amount=tx_amount,
+            target_dates=_date_ordinals([transaction.get("date")]),
+            target_counterparty=tx_contact,
+            target_ref=None,  # Don't use ref in this pass
+            target_item=transaction,
+        )
 
-    # If we have multiple candidates with the same top score, it's ambiguous
-    # Return None to avoid false positives
-    if len(candidates) > 1 and candidates[0][0] == candidates[1][0]:
-        return None
+        if result:
+            candidates.append(result)
 
-    return candidates[0][1]
+    return _select_best(candidates)
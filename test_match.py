@@ -5,6 +5,9 @@ Or: python test_match.py
 """
 
 import unittest
+from unittest import mock
+
+from src import match
 from src.match import (
     normalize_reference,
     levenshtein_distance,
@@ -14,6 +17,9 @@ from src.match import (
     get_counterparty,
     get_attachment_dates,
     is_direction_compatible,
+    find_attachment,
+    find_attachments_bulk,
+    Matcher,
 )
 
 
@@ -79,6 +85,83 @@ class TestLevenshteinDistance(unittest.TestCase):
         self.assertEqual(levenshtein_distance("hello", ""), 5)
         self.assertEqual(levenshtein_distance("", ""), 0)
 
+    def test_long_strings(self):
+        # Longer than the bit-parallel pattern limit, uses the full matrix
+        self.assertEqual(levenshtein_distance("a" * 70, "a" * 68 + "bb"), 2)
+        self.assertEqual(levenshtein_distance("a" * 70, "a" * 80), 10)
+
+    def test_max_distance_within_cutoff(self):
+        self.assertEqual(levenshtein_distance("kitten", "sitting", max_distance=3), 3)
+
+    def test_max_distance_exceeded(self):
+        # Returns max_distance + 1 once the cutoff is exceeded
+        self.assertEqual(levenshtein_distance("kitten", "sitting", max_distance=1), 2)
+        self.assertEqual(levenshtein_distance("cat", "category", max_distance=2), 3)
+        self.assertEqual(levenshtein_distance("a" * 70, "b" * 70, max_distance=5), 6)
+
+
+class TestMyersDistance(unittest.TestCase):
+    """Test the bit-parallel Levenshtein implementation directly."""
+
+    def test_basic_edits(self):
+        self.assertEqual(match._myers_distance("kitten", "sitting"), 3)
+        self.assertEqual(match._myers_distance("cat", "cats"), 1)
+        self.assertEqual(match._myers_distance("hello", "hello"), 0)
+
+    def test_finnish_names(self):
+        self.assertEqual(match._myers_distance("meikäläinen", "meittiläinen"), 3)
+
+    def test_empty_pattern(self):
+        self.assertEqual(match._myers_distance("", "hello"), 5)
+
+    def test_pattern_at_length_limit(self):
+        self.assertEqual(match._myers_distance("a" * 64, "a" * 62 + "bb"), 2)
+
+
+class TestPurePythonLevenshtein(unittest.TestCase):
+    """Test levenshtein_distance with the optional rapidfuzz backend disabled."""
+
+    def setUp(self):
+        patcher = mock.patch.object(match, "_rf_levenshtein", None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_short_strings(self):
+        self.assertEqual(levenshtein_distance("kitten", "sitting"), 3)
+        self.assertEqual(levenshtein_distance("sitting", "kitten"), 3)
+        self.assertEqual(levenshtein_distance("meikäläinen", "meittiläinen"), 3)
+        self.assertEqual(levenshtein_distance("", "hello"), 5)
+
+    def test_long_ascii_strings(self):
+        # Longer than the bit-parallel limit: matrix path over bytes
+        self.assertEqual(levenshtein_distance("a" * 70, "a" * 68 + "bb"), 2)
+        self.assertEqual(levenshtein_distance("a" * 70, "a" * 80), 10)
+
+    def test_long_non_ascii_strings(self):
+        self.assertEqual(levenshtein_distance("ä" * 70, "ä" * 68 + "öö"), 2)
+
+    def test_max_distance(self):
+        self.assertEqual(levenshtein_distance("kitten", "sitting", max_distance=3), 3)
+        self.assertEqual(levenshtein_distance("kitten", "sitting", max_distance=1), 2)
+        self.assertEqual(levenshtein_distance("cat", "category", max_distance=2), 3)
+
+    def test_max_distance_long_strings(self):
+        self.assertEqual(levenshtein_distance("a" * 70, "b" * 70, max_distance=5), 6)
+        self.assertEqual(levenshtein_distance("a" * 70, "a" * 68 + "bb", max_distance=2), 2)
+        # Row minimum stays under the cutoff, but the final distance (39) exceeds it
+        s1 = "a" * 61 + "bbbbb"
+        s2 = "bbbaaabbaabbbbbbbbbaababaabbaabbabbaabaababbbbbaaaababbaabbbbbabaa"
+        self.assertEqual(levenshtein_distance(s1, s2), 39)
+        self.assertEqual(levenshtein_distance(s1, s2, max_distance=37), 38)
+
+    def test_fuzzy_names_match(self):
+        self.assertTrue(match._normalized_names_match.__wrapped__(
+            match._normalize_name("Meikäläinen"), match._normalize_name("Meikälöinen")
+        ))
+        self.assertFalse(match._normalized_names_match.__wrapped__(
+            match._normalize_name("Matti Meikäläinen"), match._normalize_name("Matti Meittiläinen")
+        ))
+
 
 class TestNamesMatch(unittest.TestCase):
     """Test name matching logic."""
@@ -108,6 +191,22 @@ class TestNamesMatch(unittest.TestCase):
         # "Meikäläinen" vs "Meikälöinen" - 1 character difference
         self.assertTrue(names_match("Meikäläinen", "Meikälöinen"))
 
+    def test_exact_and_fuzzy_words_combined(self):
+        self.assertTrue(names_match("Matti Meikälöinen", "Matti Meikäläinen Tmi"))
+
+    def test_short_word_mismatch_rejected(self):
+        # Short words need an exact match, even if the long words match
+        self.assertFalse(names_match("Maija Meikäläinen", "Matti Meikäläinen"))
+
+    def test_fuzzy_match_at_threshold(self):
+        # 3 edits in 20 characters is exactly 85% similar, which still matches
+        for backend in (match._rf_levenshtein, None):
+            with self.subTest(rapidfuzz=backend is not None), mock.patch.object(match, "_rf_levenshtein", backend):
+                match._normalized_names_match.cache_clear()
+                self.assertTrue(names_match("a" * 20, "a" * 17 + "bbb"))
+                self.assertFalse(names_match("a" * 20, "a" * 16 + "bbbb"))
+        match._normalized_names_match.cache_clear()
+
     def test_none_values(self):
         self.assertFalse(names_match(None, "John Doe"))
         self.assertFalse(names_match("John Doe", None))
@@ -265,6 +364,85 @@ class TestIsDirectionCompatible(unittest.TestCase):
         self.assertFalse(is_direction_compatible(100.0, attachment))
 
 
+class TestFindAttachmentsBulk(unittest.TestCase):
+    """Test batch attachment matching."""
+
+    def setUp(self):
+        self.attachments = [
+            {"id": 1, "data": {"supplier": "Vendor", "total_amount": 50.0, "due_date": "2024-07-15"}},
+            {"id": 2, "data": {"recipient": "Customer", "total_amount": 80.0, "reference": "0012 34"}},
+        ]
+
+    def test_matches_in_transaction_order(self):
+        transactions = [
+            {"id": 10, "amount": 80.0, "date": "2024-01-01", "reference": "1234", "contact": None},
+            {"id": 11, "amount": -50.0, "date": "2024-07-15", "reference": None, "contact": None},
+            {"id": 12, "amount": -99.0, "date": "2024-07-15", "reference": None, "contact": None},
+        ]
+        results = find_attachments_bulk(transactions, self.attachments)
+        self.assertEqual([r["id"] if r else None for r in results], [2, 1, None])
+
+    def test_agrees_with_find_attachment(self):
+        transaction = {"id": 11, "amount": -50.0, "date": "2024-07-16", "reference": None, "contact": None}
+        self.assertIs(
+            find_attachments_bulk([transaction], self.attachments)[0],
+            find_attachment(transaction, self.attachments),
+        )
+
+
+class TestMatcher(unittest.TestCase):
+    """Test the reusable attachment matcher."""
+
+    def test_reference_match_ignores_direction(self):
+        attachments = [{"id": 1, "data": {"supplier": "Vendor", "total_amount": 10.0, "reference": "RF0012"}}]
+        transaction = {"id": 10, "amount": 999.0, "date": "2024-01-01", "reference": "RF 12", "contact": None}
+        self.assertIs(Matcher(attachments).find_attachment(transaction), attachments[0])
+
+    def test_duplicate_reference_returns_first(self):
+        attachments = [
+            {"id": 1, "data": {"supplier": "Vendor", "total_amount": 10.0, "reference": "555"}},
+            {"id": 2, "data": {"supplier": "Vendor", "total_amount": 20.0, "reference": "0555"}},
+        ]
+        transaction = {"id": 10, "amount": -20.0, "date": "2024-01-01", "reference": "555", "contact": None}
+        self.assertEqual(Matcher(attachments).find_attachment(transaction)["id"], 1)
+
+    def test_amount_within_tolerance_across_cent_buckets(self):
+        attachments = [{"id": 1, "data": {"supplier": "Vendor", "total_amount": 100.009, "due_date": "2024-07-15"}}]
+        transaction = {"id": 10, "amount": -100.0, "date": "2024-07-15", "reference": None, "contact": None}
+        self.assertIs(Matcher(attachments).find_attachment(transaction), attachments[0])
+
+    def test_amount_within_tolerance_rounding_to_distant_buckets(self):
+        # round() would put 2.205 and 2.215 two cent buckets apart
+        attachments = [{"id": 1, "data": {"supplier": "Vendor", "total_amount": 2.215, "due_date": "2024-07-15"}}]
+        transaction = {"id": 10, "amount": -2.205, "date": "2024-07-15", "reference": None, "contact": None}
+        self.assertIs(Matcher(attachments).find_attachment(transaction), attachments[0])
+
+    def test_attachment_without_amount_does_not_break_matching(self):
+        attachments = [
+            {"id": 1, "data": {"supplier": "Vendor", "total_amount": None, "due_date": "2024-07-15"}},
+            {"id": 2, "data": {"supplier": "Vendor", "total_amount": float("nan"), "reference": "77"}},
+            {"id": 3, "data": {"supplier": "Vendor", "total_amount": 50.0, "due_date": "2024-07-15"}},
+        ]
+        matcher = Matcher(attachments)
+        by_ref = {"id": 10, "amount": -1.0, "date": "2024-01-01", "reference": "77", "contact": None}
+        by_amount = {"id": 11, "amount": -50.0, "date": "2024-07-15", "reference": None, "contact": None}
+        self.assertIs(matcher.find_attachment(by_ref), attachments[1])
+        self.assertIs(matcher.find_attachment(by_amount), attachments[2])
+
+    def test_direction_mismatch_not_matched(self):
+        attachments = [{"id": 1, "data": {"recipient": "Customer", "total_amount": 100.0, "due_date": "2024-07-15"}}]
+        transaction = {"id": 10, "amount": -100.0, "date": "2024-07-15", "reference": None, "contact": None}
+        self.assertIsNone(Matcher(attachments).find_attachment(transaction))
+
+    def test_find_all_keyed_by_transaction_id(self):
+        attachments = [{"id": 1, "data": {"supplier": "Vendor", "total_amount": 50.0, "due_date": "2024-07-15"}}]
+        transactions = [
+            {"id": 10, "amount": -50.0, "date": "2024-07-15", "reference": None, "contact": None},
+            {"id": 11, "amount": -60.0, "date": "2024-07-15", "reference": None, "contact": None},
+        ]
+        self.assertEqual(Matcher(attachments).find_all(transactions), {10: attachments[0], 11: None})
+
+
 if __name__ == "__main__":
     # Run tests with verbose output
     unittest.main(verbosity=2)